@@ -7,7 +7,8 @@ from google.genai import types
 
 from shared.callbacks import display_agent_state, set_agent_state
 from shared.model import get_model
-from shared.tools import set_state_tool, load_file_data_into_state_tool
+from shared.tools import set_state_tool, load_file_data_into_state_tool, list_files_tool, resume_run_tool
+from .callbacks import reset_problem_state
 from .constants import Field
 from .sub_agents.c4_team import c4_team
 from .sub_agents.solution_architecture_team import solution_architecture_team
@@ -27,10 +28,11 @@ root_agent = Agent(
 
     WORKFLOW:
     1. SOLUTION DESIGN:
-        - Ask user for filename (ex: filename.txt) to load from 'problems' directory.
+        - Use 'list_files_tool' to list the files in the 'problems' directory. If the user mentions a topic, pass it as 'query'.
+        - Show the filenames with their previews and ask the user which file (ex: filename.txt) to load.
         - Use 'set_state_tool' to save the filename into the {Field.PROBLEM_FILENAME} field.
         - Use 'load_file_data_into_state_tool' to load the file from the 'problems' directory into the {Field.PROBLEM} field.
-        - Inform the user the file is loaded.
+        - Inform the user the file is loaded. If the tool reports it was truncated, tell the user it was trimmed to fit.
         - Ask the user if they wish to proceed with solution design.
         - Hand off to 'solution_architecture_team'.
 
@@ -38,11 +40,19 @@ root_agent = Agent(
         - If the user wants to create C4 diagrams, check if {Field.ARCHITECTURE_SOLUTION} exists in the state.
         - If it does, confirm with the user to proceed with C4 diagram creation.
         - Hand off to 'c4_team'.
+
+    3. RESUMING:
+        - Only if the user wants to resume an interrupted run, call 'resume_run_tool', then hand off to the team that was running.
+        - Completed steps and diagrams of that run are checkpointed in the state and skipped automatically.
+        - Otherwise, every hand off starts a new run, ex: to revise the solution or to create the C4 diagrams again.
+        - C4 diagrams deferred because the run budget was spent are kept. Hand off to 'c4_team' to create them.
     """,
     generate_content_config=types.GenerateContentConfig(temperature=0),
     tools=[
+        list_files_tool,
         set_state_tool,
         load_file_data_into_state_tool,
+        resume_run_tool,
     ],
     sub_agents=[
         solution_architecture_team,
@@ -52,4 +62,6 @@ root_agent = Agent(
         Field.TIMESTAMP: lambda: datetime.now().strftime('%Y%m%d%H%M'),
     }),
     after_agent_callback=display_agent_state,
+    after_tool_callback=reset_problem_state,
 )
+
@@ -0,0 +1,31 @@
+from typing import Dict, Any, Optional
+
+from google.adk.tools import BaseTool, ToolContext
+
+from .constants import Field
+
+
+# noinspection PyUnusedLocal
+def reset_problem_state(
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: ToolContext,
+        tool_response: Dict,
+) -> Optional[Dict]:
+    """
+    Reset the state derived from the previous problem once a new problem is loaded, so the new problem is seeded
+    from similar past solutions instead of starting from the previous solution, its feedback and its diagrams.
+    """
+    if (
+            tool.name == "load_file_data_into_state_tool"
+            and args.get("field") == Field.PROBLEM
+            and tool_response.get("status") == "success"
+    ):
+        tool_context.state.update({
+            Field.ARCHITECTURE_SOLUTION: None,
+            # reset to an empty list, since feedback is appended to it
+            Field.CRITICAL_FEEDBACK: [],
+            Field.SEED_SOLUTION_FILENAME: None,
+            # C4 requests, including deferred ones, belong to the previous solution
+            "c4": {},
+        })
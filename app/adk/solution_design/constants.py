@@ -7,3 +7,4 @@ class Field(StrEnum):
     PROBLEM = "problem"
     ARCHITECTURE_SOLUTION = "architecture_solution"
     CRITICAL_FEEDBACK = "critical_feedback"
+    SEED_SOLUTION_FILENAME = "seed_solution_filename"
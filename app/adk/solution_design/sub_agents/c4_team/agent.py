@@ -1,3 +1,6 @@
+import os
+import shlex
+
 from dotenv import load_dotenv
 from google.adk import Agent
 from google.adk.agents import SequentialAgent, LoopAgent
@@ -6,7 +9,12 @@ from google.adk.tools.mcp_tool import MCPToolset, StdioConnectionParams
 from google.genai import types
 from mcp import StdioServerParameters
 
-from shared.callbacks import display_tool_state, display_agent_state
+from shared.budget import start_budget, track_token_usage
+from shared.callbacks import display_tool_state, display_agent_state, skip_if_checkpointed, save_checkpoint, \
+    start_run
+from .callbacks import set_mermaid_syntax, inject_mermaid_syntax, skip_generated_diagram, \
+    defer_remaining_when_over_budget, drop_stale_c4_requests, mark_diagram_rendered, skip_analysis_when_deferred
+from .schema import C4Diagram
 from .tools import save_new_c4_request_tool, \
     get_next_unprocessed_c4_request_tool, save_processed_c4_request_tool, save_png_file_as_artifact_tool
 
@@ -52,7 +60,9 @@ c4_content_analyzer = Agent(
         save_new_c4_request_tool,
     ],
     before_tool_callback=display_tool_state,
-    before_agent_callback=display_agent_state,
+    before_agent_callback=[display_agent_state, skip_if_checkpointed, skip_analysis_when_deferred],
+    after_agent_callback=save_checkpoint,
+    after_model_callback=track_token_usage,
 )
 
 c4_processor = Agent(
@@ -89,68 +99,46 @@ c4_processor = Agent(
         exit_loop,
     ],
     before_tool_callback=display_tool_state,
-    before_agent_callback=display_agent_state,
+    before_agent_callback=[display_agent_state, defer_remaining_when_over_budget],
+    after_model_callback=track_token_usage,
 )
 
 c4_syntax = Agent(
     name="c4_syntax",
     model=model,
-    description="Generate mermaid syntax for C4 diagrams.",
+    description="Describe C4 diagrams as structured elements, boundaries and relationships.",
     instruction="""
     ROLE: 
     - You are a Technical Diagram Specialist. 
-    - Your specific role is to translate architecture descriptions into valid Mermaid C4 syntax.
+    - Your specific role is to translate architecture descriptions into C4 diagram elements.
     
     TASKS:
     - Analyze ARCHITECTURE SOLUTION to identify all Users, Systems, Containers and Relationships.
-    - Based on DIAGRAM TYPE and DESCRIPTION, generate ONLY the raw Mermaid code for a C4 diagram.
-    
-    SYNTAX GUARDRAILS:
-    - Based on the DIAGRAM TYPE, ONLY use the approved elements:     
-        - context: C4Context, Enterprise_Boundary, System_Boundary, Person, Person_Ext, System, System_Ext, SystemDb, SystemDb_Ext, Rel, BiRel, UpdateLayoutConfig.
-        - container: C4Container, System_Boundary, Person, Person_Ext, System, System_Ext, SystemDb, SystemDb_Ext, Container, Container_Ext, ContainerDb, ContainerDb_Ext, Rel, BiRel, UpdateLayoutConfig.
-    - Use %% for comments.
-    - Display the output in markdown code blocks (```mermaid ```).
+    - Based on DIAGRAM TYPE and DESCRIPTION, return ONLY a JSON object describing the C4 diagram.
     
-    STRICT RULES:
-    - DO NOT include introductory text (e.g., "Here is your diagram...").
-    - DO NOT include concluding remarks.
-    
-    CONTEXT EXAMPLE:    
-    C4Context
-        title [TITLE] - System Context Diagram
-        
-        Enterprise_Boundary(b0, "My Organization") {
-            Person(user1, "User Name", "Description of user")
-            
-            System_Boundary(b1, "Cluster Name") {
-                System(sys1, "System Name", "Description")
-                SystemDb(db1, "Database Name", "Description")
-            }
-        }
-        
-        %% Relationships
-        Rel(user1, sys1, "Uses", "HTTPS")
-        BiRel(sys1, db1, "Reads/Writes")
-
-    CONTAINER EXAMPLE:    
-    C4Container
-        title [TITLE] - Container Diagram
+    GUARDRAILS:
+    - Based on the DIAGRAM TYPE, ONLY use the approved kinds:     
+        - context: Enterprise_Boundary, System_Boundary, Person, Person_Ext, System, System_Ext, SystemDb, SystemDb_Ext.
+        - container: System_Boundary, Container_Boundary, Person, Person_Ext, System, System_Ext, SystemDb, SystemDb_Ext, Container, Container_Ext, ContainerDb, ContainerDb_Ext.
+    - Every alias must be unique and use only letters, digits and underscores.
+    - Use 'boundary' on an element and 'parent' on a boundary to nest them.
+    - Relationships must only reference element aliases.
+    - Keep labels and descriptions short.
     
-        Person(user, "Customer")
-        System_Ext(mail, "E-Mail System")
-        System_Ext(main, "Mainframe")
-    
-        Container_Boundary(ib, "Internet Banking") {{
-            Container(mobile, "Mobile App", "Xamarin")
-            Container(web, "Web App", "Spring MVC")
-            ContainerDb(db, "Database", "SQL")
-        }}
-    
-        %% Relationships
-        Rel(user, web, "HTTPS")
-        Rel(user, mobile, "Uses")
-        Rel(mail, user, "E-mails")
+    EXAMPLE:
+    {
+        "title": "Internet Banking",
+        "boundaries": [{"alias": "ib", "kind": "Container_Boundary", "label": "Internet Banking"}],
+        "elements": [
+            {"alias": "user", "kind": "Person", "label": "Customer"},
+            {"alias": "web", "kind": "Container", "label": "Web App", "technology": "Spring MVC", "boundary": "ib"},
+            {"alias": "db", "kind": "ContainerDb", "label": "Database", "technology": "SQL", "boundary": "ib"}
+        ],
+        "relationships": [
+            {"source": "user", "target": "web", "label": "Uses", "technology": "HTTPS"},
+            {"source": "web", "target": "db", "label": "Reads/Writes", "bidirectional": true}
+        ]
+    }
                
     DIAGRAM TYPE:
     { diagram_type }
@@ -162,9 +150,11 @@ c4_syntax = Agent(
     { architecture_solution }
     """,
     generate_content_config=types.GenerateContentConfig(temperature=0),
-    output_key="mermaid_syntax",
-    before_tool_callback=display_tool_state,
-    before_agent_callback=display_agent_state,
+    output_schema=C4Diagram,
+    output_key="c4_diagram",
+    before_agent_callback=[display_agent_state, skip_generated_diagram],
+    after_agent_callback=set_mermaid_syntax,
+    after_model_callback=track_token_usage,
 )
 
 c4_writer = Agent(
@@ -175,18 +165,16 @@ c4_writer = Agent(
     You are a C4 syntax writer.
     
     1. Call 'generate' tool to create a diagram with the following configuration:
-        - code: Use mermaid syntax below.
+        - code: "mermaid_syntax". The tool will replace it with the generated mermaid syntax.
         - name: { png_filename }. Do not suffix with .png, the tool will handle it.
         - folder: { png_directory_path }
     2. Call 'save_png_file_as_artifact_tool' to save the generated PNG file:
         - png_filename: { png_filename }
         - png_directory_path: { png_directory_path }
-    3. Call 'save_processed_c4_request_tool' to save the mermaid syntax back to the state.
+    3. Call 'save_processed_c4_request_tool' to mark the request as processed:
+        - key: { key }
     4. After the tool returns, immediately state: "C4 syntax has been saved successfully. Task complete."
     5. DO NOT call any tools again after receiving a success message.
-    
-    MERMAID SYNTAX:
-    { mermaid_syntax }
     """,
     generate_content_config=types.GenerateContentConfig(temperature=0),
     tools=[
@@ -196,9 +184,8 @@ c4_writer = Agent(
                     command="env",
                     args=[
                         "CONTENT_IMAGE_SUPPORTED=false",
-                        "npx",
-                        "-y",
-                        "@peng-shawn/mermaid-mcp-server"
+                        # MERMAID_MCP_COMMAND allows swapping the renderer, ex: with a stub when load testing
+                        *shlex.split(os.getenv("MERMAID_MCP_COMMAND", "npx -y @peng-shawn/mermaid-mcp-server")),
                     ],
                 ),
                 timeout=30,
@@ -207,8 +194,10 @@ c4_writer = Agent(
         save_png_file_as_artifact_tool,
         save_processed_c4_request_tool,
     ],
-    before_tool_callback=display_tool_state,
+    before_tool_callback=[display_tool_state, inject_mermaid_syntax],
+    after_tool_callback=mark_diagram_rendered,
     before_agent_callback=display_agent_state,
+    after_model_callback=track_token_usage,
 )
 
 c4_diagram_generator_team = LoopAgent(
@@ -229,4 +218,5 @@ c4_team = SequentialAgent(
         c4_content_analyzer,
         c4_diagram_generator_team,
     ],
+    before_agent_callback=[start_budget, start_run, drop_stale_c4_requests],
 )
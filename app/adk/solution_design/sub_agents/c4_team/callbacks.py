@@ -0,0 +1,145 @@
+import logging
+from typing import Dict, Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import BaseTool, ToolContext
+from google.genai.types import Content, Part
+
+from shared.budget import is_budget_nearly_spent
+from shared.callbacks import get_current_run, exit_enclosing_loop
+from .mermaid import emit_mermaid
+
+
+def drop_stale_c4_requests(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Drop the C4 requests of earlier runs, so a new run creates its diagrams again while a resumed run keeps its own.
+    Requests deferred by an earlier run are kept and moved into the new run instead.
+    """
+    run_id = get_current_run(callback_context)["id"]
+    state = callback_context.state.get("c4", {})
+
+    kept = {}
+    for key, info in state.items():
+        if info.get("run_id") == run_id:
+            kept[key] = info
+        elif info.get("deferred") and not info["processed"]:
+            kept[key] = {**info, "run_id": run_id}
+
+    callback_context.state["c4"] = kept
+
+
+def skip_analysis_when_deferred(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Skip the analysis if requests deferred by an earlier run are pending, so those are created first instead of
+    analyzing the solution again.
+    """
+    deferred = [info for info in callback_context.state.get("c4", {}).values() if info.get("deferred")]
+
+    if deferred:
+        return Content(
+            role="model",
+            parts=[Part(text=f"Creating {len(deferred)} C4 diagram(s) deferred by the previous run.")],
+        )
+
+
+def set_mermaid_syntax(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Build the Mermaid syntax from the structured diagram returned by the model and save it in the state.
+    """
+    diagram = callback_context.state.get("c4_diagram")
+
+    if not diagram:
+        logging.warning(f"[{callback_context.agent_name}] No structured C4 diagram found in state.")
+        return None
+
+    mermaid_syntax = emit_mermaid(callback_context.state.get("diagram_type"), diagram)
+
+    # checkpoint the generated diagram on its request, so a resumed run does not generate it again
+    state = callback_context.state.get("c4")
+    state[str(callback_context.state.get("key"))].update({
+        "c4_diagram": diagram,
+        "mermaid_syntax": mermaid_syntax,
+    })
+
+    callback_context.state.update({
+        "c4": state,
+        "mermaid_syntax": mermaid_syntax,
+    })
+
+
+def skip_generated_diagram(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Skip the agent if the current C4 request already has Mermaid syntax from an earlier, interrupted run.
+    """
+    if callback_context.state.get("mermaid_syntax"):
+        return Content(
+            role="model",
+            parts=[Part(text="C4 diagram already generated, reusing it.")],
+        )
+
+
+def defer_remaining_when_over_budget(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Stop generating diagrams once the run budget is nearly spent. Remaining requests are marked as deferred and
+    kept, see drop_stale_c4_requests.
+    """
+    if not is_budget_nearly_spent(callback_context):
+        return None
+
+    state = callback_context.state.get("c4", {})
+    deferred = [info for info in state.values() if not info["processed"]]
+
+    for info in deferred:
+        info["deferred"] = True
+
+    callback_context.state["c4"] = state
+
+    return exit_enclosing_loop(
+        callback_context,
+        f"Run budget is nearly spent. Deferred {len(deferred)} C4 diagram(s) to the next run."
+    )
+
+
+# noinspection PyUnusedLocal
+def inject_mermaid_syntax(
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: ToolContext
+) -> Optional[Dict]:
+    """
+    Pass the generated Mermaid syntax to the renderer, so the model never has to copy it into the tool call.
+    Rendering is skipped if the diagram was already rendered for the current request.
+    """
+    if tool.name != "generate":
+        return None
+
+    request = tool_context.state.get("c4", {}).get(str(tool_context.state.get("key")), {})
+
+    # the diagram was rendered before the run was interrupted, so do not render it again
+    if request.get("rendered"):
+        return {
+            "status": "success",
+            "message": f"Diagram already rendered to {request['png_filename']}.",
+        }
+
+    args["code"] = tool_context.state.get("mermaid_syntax")
+
+
+# noinspection PyUnusedLocal
+def mark_diagram_rendered(
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: ToolContext,
+        tool_response: Dict,
+) -> Optional[Dict]:
+    """
+    Record on the current request that its diagram was rendered, so a resumed run does not render it again.
+    """
+    if tool.name != "generate" or tool_response.get("isError"):
+        return None
+
+    state = tool_context.state.get("c4")
+    state[str(tool_context.state.get("key"))]["rendered"] = True
+
+    # reassign so the change is recorded in the state delta
+    tool_context.state["c4"] = state
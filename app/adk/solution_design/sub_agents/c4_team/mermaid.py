@@ -0,0 +1,171 @@
+import logging
+import re
+from typing import Any
+
+INDENT = "    "
+
+DIAGRAM_HEADERS = {
+    "context": ("C4Context", "System Context Diagram"),
+    "container": ("C4Container", "Container Diagram"),
+}
+
+# context diagrams cannot show containers, so container-level kinds are lifted to their system equivalent
+CONTEXT_KIND_MAPPING = {
+    "Container": "System",
+    "Container_Ext": "System_Ext",
+    "ContainerDb": "SystemDb",
+    "ContainerDb_Ext": "SystemDb_Ext",
+    "Container_Boundary": "System_Boundary",
+}
+
+CONTAINER_KIND_MAPPING = {
+    "Enterprise_Boundary": "System_Boundary",
+}
+
+CONTAINER_KINDS = {"Container", "Container_Ext", "ContainerDb", "ContainerDb_Ext"}
+
+
+def _alias(value: str) -> str:
+    alias = re.sub(r"\W", "_", value.strip()) or "node"
+    return f"n_{alias}" if alias[0].isdigit() else alias
+
+
+def _text(value: Any) -> str:
+    # double quotes and line breaks terminate Mermaid string arguments
+    return " ".join(str(value or "").replace('"', "'").split())
+
+
+def _args(*values: Any) -> str:
+    return ", ".join(f'"{_text(v)}"' for v in values)
+
+
+def emit_mermaid(diagram_type: str, diagram: dict[str, Any]) -> str:
+    """
+    Build Mermaid C4 syntax from a structured diagram (see schema.C4Diagram).
+
+    Element and boundary kinds are coerced to the ones allowed for the diagram type, aliases are sanitized and made
+    unique, and relationships pointing at unknown elements are dropped, so the output always renders. An unknown diagram type
+    is rendered as a container diagram.
+
+    :param diagram_type: "context" or "container"
+    :param diagram: Diagram as a dict of title, boundaries, elements and relationships
+    :return: Mermaid C4 syntax
+    """
+    requested_type = diagram_type
+    diagram_type = str(diagram_type or "").strip().lower()
+
+    if diagram_type not in DIAGRAM_HEADERS:
+        logging.warning(f"Unsupported diagram type [{requested_type}], rendering it as a container diagram.")
+        diagram_type = "container"
+
+    header, suffix = DIAGRAM_HEADERS[diagram_type]
+    kind_mapping = CONTEXT_KIND_MAPPING if diagram_type == "context" else CONTAINER_KIND_MAPPING
+
+    # model aliases mapped to unique Mermaid ids, since different aliases can sanitize to the same id
+    ids = {}
+    ids_by_sanitized = {}
+
+    def assign_id(alias: str) -> str | None:
+        alias = str(alias).strip()
+        if alias in ids:
+            return None
+
+        sanitized = _alias(alias)
+        unique, suffix = sanitized, 2
+        while unique in ids.values():
+            unique, suffix = f"{sanitized}_{suffix}", suffix + 1
+
+        if unique != sanitized:
+            logging.warning(f"Alias [{alias}] clashes with another alias once sanitized, using [{unique}].")
+
+        ids[alias] = unique
+        ids_by_sanitized.setdefault(sanitized, unique)
+        return unique
+
+    def resolve(alias: Any) -> str | None:
+        # references are matched on the exact alias first, then on the sanitized one, ex: 'web app' for 'web-app'
+        if not alias:
+            return None
+        alias = str(alias).strip()
+        return ids.get(alias) or ids_by_sanitized.get(_alias(alias))
+
+    # duplicated aliases are ambiguous, so only their first boundary or element is kept
+    boundary_ids = [(assign_id(boundary["alias"]), boundary) for boundary in diagram.get("boundaries", [])]
+    element_ids = [(assign_id(element["alias"]), element) for element in diagram.get("elements", [])]
+
+    boundaries = {
+        alias: {
+            "kind": kind_mapping.get(boundary["kind"], boundary["kind"]),
+            "label": boundary["label"],
+            "parent": resolve(boundary.get("parent")),
+        }
+        for alias, boundary in boundary_ids if alias
+    }
+
+    elements = {
+        alias: {
+            "kind": kind_mapping.get(element["kind"], element["kind"]),
+            "label": element["label"],
+            "technology": element.get("technology"),
+            "description": element.get("description"),
+            "boundary": resolve(element.get("boundary")),
+        }
+        for alias, element in element_ids if alias
+    }
+
+    def element_line(alias: str, element: dict[str, Any]) -> str:
+        if element["kind"] in CONTAINER_KINDS:
+            return f'{element["kind"]}({alias}, {_args(element["label"], element["technology"], element["description"])})'
+        return f'{element["kind"]}({alias}, {_args(element["label"], element["description"])})'
+
+    def parent_of(alias: str) -> str | None:
+        parent = boundaries[alias]["parent"]
+        return parent if parent in boundaries and parent != alias else None
+
+    lines = [header, f'{INDENT}title {_text(diagram.get("title"))} - {suffix}', ""]
+    emitted = set()
+
+    def emit_boundary(alias: str, depth: int):
+        emitted.add(alias)
+        boundary = boundaries[alias]
+        lines.append(f'{INDENT * depth}{boundary["kind"]}({alias}, {_args(boundary["label"])}) {{')
+        for child_alias, element in elements.items():
+            if element["boundary"] == alias:
+                lines.append(f"{INDENT * (depth + 1)}{element_line(child_alias, element)}")
+        for child_alias in boundaries:
+            if child_alias not in emitted and parent_of(child_alias) == alias:
+                emit_boundary(child_alias, depth + 1)
+        lines.append(f"{INDENT * depth}}}")
+
+    for alias, element in elements.items():
+        if element["boundary"] not in boundaries:
+            lines.append(f"{INDENT}{element_line(alias, element)}")
+
+    for alias in boundaries:
+        if alias not in emitted and parent_of(alias) is None:
+            emit_boundary(alias, 1)
+    # boundaries caught in a parent cycle have no reachable root, so emit them at the top level
+    for alias in boundaries:
+        if alias not in emitted:
+            emit_boundary(alias, 1)
+
+    relationships = [
+        (resolve(relationship["source"]), resolve(relationship["target"]), relationship)
+        for relationship in diagram.get("relationships", [])
+    ]
+    relationships = [
+        (source, target, relationship) for source, target, relationship in relationships
+        if source in elements and target in elements
+    ]
+
+    if relationships:
+        lines += ["", f"{INDENT}%% Relationships"]
+
+    for source, target, relationship in relationships:
+        kind = "BiRel" if relationship.get("bidirectional") else "Rel"
+        values = [relationship["label"]]
+        if relationship.get("technology"):
+            values.append(relationship["technology"])
+        lines.append(f"{INDENT}{kind}({source}, {target}, {_args(*values)})")
+
+    return "\n".join(lines)
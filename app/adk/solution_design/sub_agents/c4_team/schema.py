@@ -0,0 +1,45 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class C4Boundary(BaseModel):
+    alias: str = Field(description="Unique identifier, letters/digits/underscore only, ex: b1")
+    kind: Literal["Enterprise_Boundary", "System_Boundary", "Container_Boundary"]
+    label: str = Field(description="Display name of the boundary")
+    parent: Optional[str] = Field(default=None, description="Alias of the enclosing boundary, if nested")
+
+
+class C4Element(BaseModel):
+    alias: str = Field(description="Unique identifier, letters/digits/underscore only, ex: web_app")
+    kind: Literal[
+        "Person",
+        "Person_Ext",
+        "System",
+        "System_Ext",
+        "SystemDb",
+        "SystemDb_Ext",
+        "Container",
+        "Container_Ext",
+        "ContainerDb",
+        "ContainerDb_Ext",
+    ]
+    label: str = Field(description="Display name of the element")
+    technology: Optional[str] = Field(default=None, description="Technology, only used by containers")
+    description: Optional[str] = Field(default=None, description="Short description of the element")
+    boundary: Optional[str] = Field(default=None, description="Alias of the enclosing boundary, if any")
+
+
+class C4Relationship(BaseModel):
+    source: str = Field(description="Alias of the source element")
+    target: str = Field(description="Alias of the target element")
+    label: str = Field(description="What the relationship does, ex: Uses")
+    technology: Optional[str] = Field(default=None, description="Protocol or technology, ex: HTTPS")
+    bidirectional: bool = False
+
+
+class C4Diagram(BaseModel):
+    title: str
+    boundaries: list[C4Boundary] = []
+    elements: list[C4Element]
+    relationships: list[C4Relationship] = []
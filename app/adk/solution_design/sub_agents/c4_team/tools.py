@@ -4,6 +4,7 @@ from pathlib import Path
 from google.adk.tools import ToolContext
 from google.genai.types import Part
 
+from shared.callbacks import get_current_run
 from shared.utils import get_data_dir_path
 
 
@@ -11,37 +12,58 @@ def save_new_c4_request_tool(
         tool_context: ToolContext,
         diagram_type: str,
         description: str) -> dict[str, str]:
-    state = tool_context.state.setdefault("c4", {})
+    state = tool_context.state.get("c4", {})
+    run_id = get_current_run(tool_context)["id"]
+
+    # a resumed run may save the same request again, so reuse it instead of creating a duplicate
+    existing = next(
+        (info for info in state.values()
+         if info.get("run_id") == run_id
+         and info["diagram_type"] == diagram_type
+         and info["description"] == description),
+        None
+    )
+
+    if existing:
+        return {
+            **{"status": "success"},
+            **existing
+        }
 
-    # count items in state to determine the new key
-    key = len(state) + 1
+    # next key after the highest one, so a key is never reused
+    key = max((info["key"] for info in state.values()), default=0) + 1
 
-    # new request
-    state[key] = {
+    # new request, keyed by string because state is persisted as JSON
+    state[str(key)] = {
         "key": key,
+        "run_id": run_id,
         "diagram_type": diagram_type,
         "description": description,
         "processed": False,
     }
 
+    # reassign so the change is recorded in the state delta and checkpointed
+    tool_context.state["c4"] = state
+
     return {
         **{"status": "success"},
-        **state[key]
+        **state[str(key)]
     }
 
 
 def save_processed_c4_request_tool(
         tool_context: ToolContext,
-        key: int,
-        mermaid_syntax: str) -> dict[str, str]:
+        key: int) -> dict[str, str]:
     state = tool_context.state.get("c4")
-    state[key]["processed"] = True
-    state[key]["mermaid_syntax"] = mermaid_syntax
+    state[str(key)]["processed"] = True
+    state[str(key)]["mermaid_syntax"] = tool_context.state.get("mermaid_syntax")
 
     tool_context.state.update({
+        "c4": state,
         "key": None,
         "diagram_type": None,
         "description": None,
+        "c4_diagram": None,
         "mermaid_syntax": None,
         "png_filename": None,
         "png_directory_path": None,
@@ -59,12 +81,23 @@ def get_next_unprocessed_c4_request_tool(
     request = next((info for info in state.values() if not info["processed"]), None)
 
     if request:
+        request["deferred"] = False
+
+        # keep the filename stable across resumed runs, and unique across sessions sharing the images directory
+        request.setdefault(
+            "png_filename",
+            f"{datetime.now().strftime('%Y%m%d%H%M')}__{tool_context.session.id}__{request["key"]}__"
+            f"{request["diagram_type"]}.png"
+        )
+
         tool_context.state.update({
+            "c4": state,
             "key": request["key"],
             "diagram_type": request["diagram_type"],
             "description": request["description"],
-            "mermaid_syntax": None,
-            "png_filename": f"{datetime.now().strftime('%Y%m%d%H%M')}__{request["key"]}__{request["diagram_type"]}.png",
+            "c4_diagram": request.get("c4_diagram"),
+            "mermaid_syntax": request.get("mermaid_syntax"),
+            "png_filename": request["png_filename"],
             "png_directory_path": str(get_data_dir_path() / "images"),
         })
 
@@ -3,9 +3,13 @@ from google.adk.agents import SequentialAgent, LoopAgent
 from google.adk.tools import exit_loop
 from google.genai import types
 
-from shared.callbacks import display_agent_state, display_tool_state
+from shared.budget import start_budget, track_token_usage
+from shared.callbacks import display_agent_state, display_tool_state, skip_if_checkpointed, save_checkpoint, \
+    start_run
 from shared.model import get_model
 from shared.tools import append_to_state_tool, save_markdown_content_as_artifact_tool
+from .callbacks import seed_architecture_solution, index_approved_solution, exit_loop_when_over_budget, \
+    continue_solutioning, count_revision, count_review, MAX_SOLUTIONING_ITERATIONS
 from ...constants import Field
 
 model = get_model()
@@ -32,7 +36,10 @@ technical_writer = Agent(
     generate_content_config=types.GenerateContentConfig(temperature=0),
     tools=[save_markdown_content_as_artifact_tool],
     before_tool_callback=display_tool_state,
-    before_agent_callback=display_agent_state,
+    after_tool_callback=index_approved_solution,
+    before_agent_callback=[display_agent_state, skip_if_checkpointed],
+    after_agent_callback=save_checkpoint,
+    after_model_callback=track_token_usage,
 )
 
 architectural_review_board = Agent(
@@ -74,6 +81,8 @@ architectural_review_board = Agent(
     ],
     before_tool_callback=display_tool_state,
     before_agent_callback=display_agent_state,
+    after_agent_callback=count_review,
+    after_model_callback=track_token_usage,
 )
 
 solution_architect = Agent(
@@ -87,6 +96,8 @@ solution_architect = Agent(
 
     INSTRUCTIONS:
     1. Evaluate the {Field.PROBLEM} alongside any {Field.ARCHITECTURE_SOLUTION} and {Field.CRITICAL_FEEDBACK} to ensure iterative improvement.
+       - If {Field.SEED_SOLUTION_FILENAME} is set, {Field.ARCHITECTURE_SOLUTION} is an approved solution to a similar past problem.
+         Use it as a starting draft and adapt it to any differences in the {Field.PROBLEM}.
     2. Architect a solution strictly adhering to these Guardrails:
         - Use GCP managed services and cloud-native patterns for core functional components.
         - Ensure high availability, scalability, security and disaster recovery.
@@ -103,11 +114,16 @@ solution_architect = Agent(
 
     CRITICAL_FEEDBACK: 
     {{ {Field.CRITICAL_FEEDBACK}? }}
+
+    SEED_SOLUTION_FILENAME:
+    {{ {Field.SEED_SOLUTION_FILENAME}? }}
     """,
     generate_content_config=types.GenerateContentConfig(temperature=0),
     output_key=Field.ARCHITECTURE_SOLUTION,
     before_tool_callback=display_tool_state,
-    before_agent_callback=display_agent_state,
+    before_agent_callback=[display_agent_state, continue_solutioning, exit_loop_when_over_budget],
+    after_agent_callback=count_revision,
+    after_model_callback=track_token_usage,
 )
 
 solutioning_room = LoopAgent(
@@ -117,7 +133,9 @@ solutioning_room = LoopAgent(
         solution_architect,
         architectural_review_board,
     ],
-    max_iterations=3,
+    max_iterations=MAX_SOLUTIONING_ITERATIONS,
+    before_agent_callback=[skip_if_checkpointed, seed_architecture_solution],
+    after_agent_callback=save_checkpoint,
 )
 
 solution_architecture_team = SequentialAgent(
@@ -127,4 +145,5 @@ solution_architecture_team = SequentialAgent(
         solutioning_room,
         technical_writer,
     ],
+    before_agent_callback=[start_budget, start_run],
 )
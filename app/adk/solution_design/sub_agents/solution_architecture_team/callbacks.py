@@ -0,0 +1,128 @@
+import logging
+import os
+from typing import Dict, Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import BaseTool, ToolContext
+from google.genai.types import Content, Part
+
+from shared.budget import is_budget_nearly_spent
+from shared.callbacks import RUN_FIELD, get_current_run, exit_enclosing_loop
+from shared.similarity import add_to_solution_index, find_similar_solution
+from shared.utils import get_data_dir_path
+from ...constants import Field
+
+SOLUTIONS_DIRECTORY = "proposed_solutions"
+
+MAX_SOLUTIONING_ITERATIONS = 3
+
+
+def _get_similarity_threshold() -> float:
+    return float(os.getenv("SOLUTION_SIMILARITY_THRESHOLD", "0.6"))
+
+
+def seed_architecture_solution(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Seed the architecture solution with the approved solution of the most similar past problem, if any.
+    """
+    state = callback_context.state
+
+    if state.get(Field.ARCHITECTURE_SOLUTION) or not state.get(Field.PROBLEM):
+        return None
+
+    match = find_similar_solution(state[Field.PROBLEM])
+
+    if not match or match[1] < _get_similarity_threshold():
+        return None
+
+    solution_filename, score = match
+    solution_path = get_data_dir_path() / SOLUTIONS_DIRECTORY / solution_filename
+
+    if not solution_path.exists():
+        logging.warning(f"Indexed solution [{solution_filename}] no longer exists.")
+        return None
+
+    logging.info(f"Seeding architecture solution from [{solution_filename}] with similarity [{score:.2f}].")
+
+    with open(solution_path, "r") as f:
+        state.update({
+            Field.ARCHITECTURE_SOLUTION: f.read(),
+            Field.SEED_SOLUTION_FILENAME: solution_filename,
+        })
+
+
+def exit_loop_when_over_budget(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Stop iterating on the architecture solution once the run budget is nearly spent, keeping the latest revision.
+    """
+    if callback_context.state.get(Field.ARCHITECTURE_SOLUTION) and is_budget_nearly_spent(callback_context):
+        return exit_enclosing_loop(
+            callback_context,
+            "Run budget is nearly spent. Proceeding with the latest architecture solution."
+        )
+
+
+def continue_solutioning(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Continue the solutioning loop of a resumed run where it stopped. The architect is skipped while its latest
+    revision is not reviewed yet, and the loop exits once all iterations are done.
+    """
+    run = get_current_run(callback_context) or {}
+    revisions, reviews = run.get("revisions", 0), run.get("reviews", 0)
+
+    if revisions >= MAX_SOLUTIONING_ITERATIONS:
+        return exit_enclosing_loop(
+            callback_context,
+            "All iterations are done. Proceeding with the latest architecture solution."
+        )
+
+    if revisions > reviews:
+        return Content(
+            role="model",
+            parts=[Part(text="The latest architecture solution is not reviewed yet, reviewing it.")],
+        )
+
+
+def _count_in_run(callback_context: CallbackContext, field: str):
+    run = get_current_run(callback_context)
+
+    if run:
+        run[field] = run.get(field, 0) + 1
+
+        # reassign so the change is recorded in the state delta
+        callback_context.state[RUN_FIELD] = run
+
+
+def count_revision(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Record a completed revision of the architecture solution in the current run. From then on the solution is the
+    architect's own draft rather than the seeded one, so the seed filename is cleared.
+    """
+    _count_in_run(callback_context, "revisions")
+    callback_context.state[Field.SEED_SOLUTION_FILENAME] = None
+
+
+def count_review(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Record a completed review of the architecture solution in the current run.
+    """
+    _count_in_run(callback_context, "reviews")
+
+
+# noinspection PyUnusedLocal
+def index_approved_solution(
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: ToolContext,
+        tool_response: Dict,
+) -> Optional[Dict]:
+    """
+    Add the saved solution document to the similarity index, keyed by the problem it solves.
+    """
+    if (
+            tool.name == "save_markdown_content_as_artifact_tool"
+            and args.get("directory") == SOLUTIONS_DIRECTORY
+            and tool_response.get("status") == "success"
+            and tool_context.state.get(Field.PROBLEM)
+    ):
+        add_to_solution_index(tool_context.state[Field.PROBLEM], args["filename"])
@@ -0,0 +1,343 @@
+"""
+Load test the 'adk web' server with concurrent sessions, from loading agentic.txt to the final C4 diagrams.
+
+Unless --server-url is given, a stub Ollama server, a stub Mermaid renderer and 'adk web' are started against a
+temporary data directory, so the run needs neither a model nor a renderer and leaves 'data/' and the local session
+storage untouched.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+APP_DIR = Path(__file__).parent.parent
+LOADTEST_DIR = Path(__file__).parent
+PROBLEM_PATH = APP_DIR.parent / "data" / "problems" / "agentic.txt"
+
+APP_NAME = "solution_design"
+
+# each turn is one stage of the pipeline, driven through the same endpoints as the web UI
+TURNS = [
+    ("upload", "Load agentic.txt"),
+    ("solution", "Proceed with solution design."),
+    ("c4", "Create the C4 diagrams."),
+]
+
+
+class Results:
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.lag = []
+        self.memory = []
+        self.errors = []
+        self.completed = 0
+
+    def add(self, stage: str, duration: float):
+        self.durations[stage].append(duration)
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    # nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percentile / 100 * len(ordered)) - 1)]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get_rss_bytes(pid: int) -> tuple[int, int] | None:
+    """
+    Get the RSS of a process and the total RSS of all its descendants, ex: the MCP renderers started per session.
+
+    :return: Tuple of process and descendants RSS in bytes, or None if the process is gone
+    """
+    # 'ps' works on both Linux and macOS without extra dependencies, unlike '--ppid' which is Linux only
+    output = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss="], capture_output=True, text=True).stdout
+
+    children = defaultdict(list)
+    rss = {}
+    for line in output.splitlines():
+        child_pid, parent_pid, child_rss = (int(value) for value in line.split())
+        children[parent_pid].append(child_pid)
+        rss[child_pid] = child_rss * 1024
+
+    if pid not in rss:
+        return None
+
+    descendants_rss = 0
+    pending = list(children[pid])
+    while pending:
+        child_pid = pending.pop()
+        descendants_rss += rss[child_pid]
+        pending.extend(children[child_pid])
+
+    return rss[pid], descendants_rss
+
+
+async def run_session(client: httpx.AsyncClient, index: int, results: Results):
+    user_id = f"load-test-{index}"
+
+    response = await client.post(f"/apps/{APP_NAME}/users/{user_id}/sessions")
+    response.raise_for_status()
+    session_id = response.json()["id"]
+
+    session_started_at = time.perf_counter()
+
+    for stage, text in TURNS:
+        started_at = time.perf_counter()
+        author, author_started_at, last_event_at = None, started_at, started_at
+
+        async with client.stream("POST", "/run_sse", json={
+            "app_name": APP_NAME,
+            "user_id": user_id,
+            "session_id": session_id,
+            "new_message": {"role": "user", "parts": [{"text": text}]},
+            "streaming": False,
+        }) as response:
+            response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+
+                event = json.loads(line.removeprefix("data:"))
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+
+                # an agent's time runs from the last event of the previous agent to its own last event
+                if event.get("author") != author:
+                    if author:
+                        results.add(f"agent:{author}", last_event_at - author_started_at)
+                    author, author_started_at = event.get("author"), last_event_at
+
+                last_event_at = time.perf_counter()
+
+        if author:
+            results.add(f"agent:{author}", last_event_at - author_started_at)
+
+        results.add(f"turn:{stage}", time.perf_counter() - started_at)
+
+    results.add("session", time.perf_counter() - session_started_at)
+    results.completed += 1
+
+
+async def sample_server(
+        client: httpx.AsyncClient,
+        server_pid: int | None,
+        interval: float,
+        started_at: float,
+        results: Results,
+        done: asyncio.Event):
+    """
+    Sample the latency of a trivial endpoint, as a proxy of the server event loop lag, and the memory of the server
+    and its child processes.
+    """
+    while not done.is_set():
+        elapsed = time.perf_counter() - started_at
+
+        request_started_at = time.perf_counter()
+        try:
+            await client.get("/list-apps")
+            results.lag.append((elapsed, time.perf_counter() - request_started_at))
+        except httpx.HTTPError as e:
+            results.errors.append(f"lag probe: {e!r}")
+
+        if server_pid:
+            rss = _get_rss_bytes(server_pid)
+            if rss:
+                results.memory.append((elapsed, *rss))
+
+        try:
+            await asyncio.wait_for(done.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load_test(args: argparse.Namespace, server_url: str, server_pid: int | None) -> tuple[Results, float]:
+    results = Results()
+    done = asyncio.Event()
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.sessions + 10)
+
+    async with httpx.AsyncClient(base_url=server_url, timeout=timeout, limits=limits) as client:
+        started_at = time.perf_counter()
+        sampler = asyncio.create_task(
+            sample_server(client, server_pid, args.sample_interval, started_at, results, done)
+        )
+
+        async def session(index: int):
+            await asyncio.sleep(index * args.ramp_up / max(1, args.sessions))
+            try:
+                await run_session(client, index, results)
+            except Exception as e:
+                results.errors.append(f"session {index}: {e!r}")
+
+        await asyncio.gather(*(session(i) for i in range(args.sessions)))
+
+        elapsed = time.perf_counter() - started_at
+        done.set()
+        await sampler
+
+    return results, elapsed
+
+
+def print_report(results: Results, elapsed: float, sessions: int):
+    print(f"\nSessions: {results.completed}/{sessions} completed in {elapsed:.1f}s, "
+          f"throughput {results.completed / elapsed * 60:.2f} sessions/min")
+
+    print(f"\n{'stage':<45}{'count':>7}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}")
+    for stage in sorted(results.durations):
+        values = results.durations[stage]
+        print(f"{stage:<45}{len(values):>7}"
+              f"{_percentile(values, 50):>10.2f}{_percentile(values, 95):>10.2f}{_percentile(values, 99):>10.2f}")
+
+    if results.lag:
+        lags = [lag for _, lag in results.lag]
+        print(f"\nEvent loop lag (probe latency): p50 {_percentile(lags, 50) * 1000:.0f}ms, "
+              f"p95 {_percentile(lags, 95) * 1000:.0f}ms, max {max(lags) * 1000:.0f}ms")
+
+    if results.memory:
+        print("\nServer memory over time, child processes include the MCP renderers:")
+        print(f"  {'elapsed':>8}{'server (MB)':>14}{'children (MB)':>16}{'total (MB)':>13}")
+        step = max(1, len(results.memory) // 20)
+        for elapsed_at, server_rss, children_rss in results.memory[::step]:
+            print(f"  {elapsed_at:>7.1f}s{server_rss / 2 ** 20:>14.1f}{children_rss / 2 ** 20:>16.1f}"
+                  f"{(server_rss + children_rss) / 2 ** 20:>13.1f}")
+
+    if results.errors:
+        print(f"\nErrors ({len(results.errors)}):")
+        for error in results.errors[:20]:
+            print(f"  {error}")
+
+
+def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before [{url}] was ready.")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+
+    raise RuntimeError(f"[{url}] was not ready after {timeout}s.")
+
+
+def start_stack(args: argparse.Namespace, data_dir: Path) -> tuple[list[subprocess.Popen], str, int]:
+    """
+    Start the stub Ollama server and 'adk web' wired to it and to the stub renderer.
+
+    :return: Started processes, URL and PID of the 'adk web' server
+    """
+    for directory in ("problems", "proposed_solutions", "images"):
+        (data_dir / directory).mkdir(parents=True, exist_ok=True)
+    shutil.copy(PROBLEM_PATH, data_dir / "problems" / PROBLEM_PATH.name)
+
+    stub_port, server_port = _free_port(), _free_port()
+    processes = []
+
+    stub = subprocess.Popen([
+        sys.executable, str(LOADTEST_DIR / "stub_ollama.py"),
+        "--port", str(stub_port),
+        "--latency", str(args.stub_latency),
+        "--tokens-per-second", str(args.stub_tokens_per_second),
+        "--script", str(args.script),
+    ])
+    processes.append(stub)
+    _wait_until_ready(f"http://127.0.0.1:{stub_port}/api/tags", stub, 30)
+
+    env = {
+        **os.environ,
+        "MODEL": "ollama_chat/stub",
+        "OLLAMA_API_BASE": f"http://127.0.0.1:{stub_port}",
+        "DATA_PATH": str(data_dir),
+        "MERMAID_MCP_COMMAND": shlex.join([sys.executable, str(LOADTEST_DIR / "stub_renderer.py")]),
+        "STUB_RENDER_LATENCY": str(args.render_latency),
+    }
+    # sessions and artifacts also go to the temporary data directory, not to the local storage of the developer
+    server = subprocess.Popen(
+        [
+            "adk", "web",
+            "--port", str(server_port),
+            "--no-reload",
+            "--session_service_uri", f"sqlite:///{data_dir / 'sessions.db'}",
+            "--artifact_service_uri", f"file://{data_dir / 'artifacts'}",
+            *shlex.split(args.adk_args),
+        ],
+        cwd=APP_DIR / "adk",
+        env=env,
+    )
+    processes.append(server)
+
+    server_url = f"http://127.0.0.1:{server_port}"
+    _wait_until_ready(f"{server_url}/list-apps", server, 120)
+
+    return processes, server_url, server.pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=10, help="Number of concurrent sessions.")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which sessions are started.")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds before a turn times out.")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between lag/memory samples.")
+    parser.add_argument("--server-url", help="Test a running server instead of starting the stubbed stack.")
+    parser.add_argument("--server-pid", type=int, help="PID of the running server, to sample its memory.")
+    parser.add_argument("--stub-latency", type=float, default=0.2, help="Seconds before the stub model answers.")
+    parser.add_argument("--stub-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--render-latency", type=float, default=1.0, help="Seconds the stub renderer takes.")
+    parser.add_argument("--script", type=Path, default=LOADTEST_DIR / "script.json")
+    parser.add_argument("--adk-args", default="", help="Extra arguments for 'adk web'.")
+    parser.add_argument("--json", type=Path, help="Write the raw results to this file.")
+    args = parser.parse_args()
+
+    processes = []
+    data_dir = Path(tempfile.mkdtemp(prefix="keep-my-job-load-test-"))
+
+    try:
+        if args.server_url:
+            server_url, server_pid = args.server_url, args.server_pid
+        else:
+            processes, server_url, server_pid = start_stack(args, data_dir)
+
+        results, elapsed = asyncio.run(run_load_test(args, server_url, server_pid))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=30)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    print_report(results, elapsed, args.sessions)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "sessions": args.sessions,
+                "completed": results.completed,
+                "elapsed": elapsed,
+                "durations": results.durations,
+                "lag": results.lag,
+                "memory": results.memory,
+                "errors": results.errors,
+            }, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
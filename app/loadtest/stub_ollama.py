@@ -0,0 +1,205 @@
+"""
+Stub server speaking the Ollama chat API, used to load test the agents without a model.
+
+Responses are scripted (see script.json): the first rule matching the request is replayed after a simulated
+latency of `--latency` seconds plus the response tokens divided by `--tokens-per-second`.
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_SCRIPT_PATH = Path(__file__).parent / "script.json"
+
+FILLER = "The platform uses managed services with least privilege access, encryption and audit logging. "
+
+
+def _text_of(message: dict) -> str:
+    content = message.get("content") or ""
+
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+    return content if isinstance(content, str) else json.dumps(content)
+
+
+def _count_tokens(text: str) -> int:
+    # rough approximation, good enough to simulate generation time
+    return max(1, len(text) // 4)
+
+
+def _get_step(messages: list[dict]) -> int:
+    """
+    Count the tool call rounds at the end of the conversation. ADK only sends the tool calls of the agent being
+    run at the tail, so this is the position of the current response within the turn of the agent.
+    """
+    step = 0
+    for message in reversed(messages):
+        if message.get("role") == "tool":
+            continue
+        if message.get("role") == "assistant" and message.get("tool_calls"):
+            step += 1
+            continue
+        break
+
+    return step
+
+
+def _get_context(messages: list[dict]) -> dict:
+    system = "\n".join(_text_of(m) for m in messages if m.get("role") == "system")
+    user_messages = [
+        _text_of(m) for m in messages
+        if m.get("role") == "user" and not _text_of(m).startswith("For context:")
+    ]
+    last_message = messages[-1] if messages else {}
+
+    return {
+        "system": system,
+        "last_user": user_messages[-1] if user_messages else "",
+        "last_tool_result": _text_of(last_message) if last_message.get("role") == "tool" else "",
+        "step": _get_step(messages),
+    }
+
+
+def _matches(rule: dict, context: dict) -> bool:
+    for key in ("system", "last_user", "last_tool_result"):
+        if key in rule and rule[key].lower() not in context[key].lower():
+            return False
+
+    return "step" not in rule or rule["step"] == context["step"]
+
+
+def _fill(value, variables: dict):
+    if isinstance(value, str):
+        return value.format_map(variables)
+    if isinstance(value, dict):
+        return {k: _fill(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, variables) for v in value]
+    return value
+
+
+def build_message(script: dict, messages: list[dict]) -> dict:
+    """
+    Build the assistant message for the first script rule matching the conversation.
+
+    :param script: Script with a list of rules
+    :param messages: Messages of the chat request
+    :return: Assistant message, with either content or tool calls
+    """
+    context = _get_context(messages)
+    rule = next((rule for rule in script["rules"] if _matches(rule, context)), None)
+
+    if rule is None:
+        return {"role": "assistant", "content": script.get("fallback", "OK.")}
+
+    # values referenced in the response, ex: {png_filename}, are extracted from the system prompt
+    variables = {}
+    for name, pattern in rule.get("extract", {}).items():
+        match = re.search(pattern, context["system"])
+        variables[name] = match.group(1).strip() if match else ""
+
+    response = rule["respond"]
+
+    if "tool_calls" in response:
+        return {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [
+                {"function": {"name": call["name"], "arguments": _fill(call.get("arguments", {}), variables)}}
+                for call in response["tool_calls"]
+            ],
+        }
+
+    content = response["content"]
+    # structured output is returned as is, its braces are not placeholders
+    content = json.dumps(content) if isinstance(content, (dict, list)) else _fill(content, variables)
+    content += FILLER * response.get("filler", 0)
+
+    return {"role": "assistant", "content": content}
+
+
+def create_app(script: dict, latency: float, tokens_per_second: float) -> FastAPI:
+    app = FastAPI()
+
+    def now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "stub", "model": "stub"}]}
+
+    @app.post("/api/show")
+    async def show():
+        # litellm only sends native tool calls if the template mentions tools
+        return {
+            "template": "{{ if .Tools }}tools{{ end }}",
+            "capabilities": ["completion", "tools"],
+            "model_info": {"stub.context_length": 131072},
+        }
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        started_at = time.perf_counter()
+        body = await request.json()
+        messages = body.get("messages", [])
+        message = build_message(script, messages)
+
+        prompt_tokens = sum(_count_tokens(_text_of(m)) for m in messages)
+        eval_tokens = _count_tokens(message["content"] or json.dumps(message.get("tool_calls")))
+
+        await asyncio.sleep(latency + eval_tokens / tokens_per_second)
+
+        final = {
+            "model": body.get("model"),
+            "created_at": now(),
+            "message": message,
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.perf_counter() - started_at) * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": eval_tokens,
+        }
+
+        if not body.get("stream"):
+            return JSONResponse(final)
+
+        async def stream():
+            # the whole message is sent in a single chunk, the simulated generation time is already spent
+            yield json.dumps({**final, "done": False}) + "\n"
+            yield json.dumps({**final, "message": {"role": "assistant", "content": ""}}) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--script", type=Path, default=DEFAULT_SCRIPT_PATH)
+    args = parser.parse_args()
+
+    with open(args.script, "r") as f:
+        script = json.load(f)
+
+    uvicorn.run(
+        create_app(script, args.latency, args.tokens_per_second),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
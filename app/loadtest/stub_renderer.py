@@ -0,0 +1,33 @@
+"""
+Stub of the Mermaid MCP server, writing a placeholder PNG instead of rendering the diagram.
+"""
+import asyncio
+import base64
+import os
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+
+# 1x1 transparent PNG
+PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+mcp = FastMCP("mermaid-stub")
+
+
+@mcp.tool()
+async def generate(code: str, name: str, folder: str, theme: str = "default", backgroundColor: str = "white") -> str:
+    """Generate a PNG image from Mermaid markdown and save it to the folder."""
+    await asyncio.sleep(float(os.getenv("STUB_RENDER_LATENCY", "1.0")))
+
+    filename = name if name.endswith(".png") else f"{name}.png"
+    target_path = Path(folder) / filename
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    target_path.write_bytes(PLACEHOLDER_PNG)
+
+    return f"Diagram saved to {target_path}"
+
+
+if __name__ == "__main__":
+    mcp.run()
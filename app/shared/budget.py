@@ -0,0 +1,89 @@
+import logging
+import os
+import time
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+from google.genai.types import Content
+
+BUDGET_STARTED_AT_FIELD = "budget_started_at"
+BUDGET_TOKENS_USED_FIELD = "budget_tokens_used"
+
+
+# the budget is opt-in, a limit is only enforced when its env var is set
+def _get_deadline_seconds() -> Optional[float]:
+    value = os.getenv("RUN_DEADLINE_SECONDS")
+    return float(value) if value else None
+
+
+def _get_token_budget() -> Optional[int]:
+    value = os.getenv("RUN_TOKEN_BUDGET")
+    return int(value) if value else None
+
+
+def _get_budget_reserve() -> float:
+    return float(os.getenv("RUN_BUDGET_RESERVE", "0.15"))
+
+
+def start_budget(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Starts a new wall-clock and token budget for the run.
+
+    :param callback_context: Callback context
+    :return: None
+    """
+    callback_context.state.update({
+        BUDGET_STARTED_AT_FIELD: time.time(),
+        BUDGET_TOKENS_USED_FIELD: 0,
+    })
+
+
+def track_token_usage(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """
+    Adds the tokens spent by a model call to the run budget.
+
+    :param callback_context: Callback context
+    :param llm_response: Model response
+    :return: None, the response is left untouched
+    """
+    # streamed chunks carry running totals, only the final response is counted
+    if llm_response.partial:
+        return None
+
+    usage = llm_response.usage_metadata
+
+    if usage and usage.total_token_count:
+        tokens_used = callback_context.state.get(BUDGET_TOKENS_USED_FIELD) or 0
+        callback_context.state[BUDGET_TOKENS_USED_FIELD] = tokens_used + usage.total_token_count
+
+
+def is_budget_nearly_spent(callback_context: CallbackContext) -> bool:
+    """
+    Checks if the run has used up its deadline or token budget, keeping a reserve to finish the current work.
+    Limits that are not configured are never reached.
+
+    :param callback_context: Callback context
+    :return: True if the remaining budget is within the reserve
+    """
+    started_at = callback_context.state.get(BUDGET_STARTED_AT_FIELD)
+    deadline_seconds = _get_deadline_seconds()
+    token_budget = _get_token_budget()
+
+    if started_at is None or (deadline_seconds is None and token_budget is None):
+        return False
+
+    threshold = 1 - _get_budget_reserve()
+    elapsed = time.time() - started_at
+    tokens_used = callback_context.state.get(BUDGET_TOKENS_USED_FIELD) or 0
+
+    if (
+            (deadline_seconds is not None and elapsed >= deadline_seconds * threshold)
+            or (token_budget is not None and tokens_used >= token_budget * threshold)
+    ):
+        logging.warning(
+            f"[{callback_context.agent_name}] Budget nearly spent: {elapsed:.0f}s elapsed, {tokens_used} tokens used."
+        )
+        return True
+
+    return False
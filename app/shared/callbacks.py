@@ -1,10 +1,17 @@
 import json
 import logging
+import uuid
 from typing import Dict, Any, Optional
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.tools import BaseTool, ToolContext
-from google.genai.types import Content
+from google.genai.types import Content, Part
+
+# current run of a team, ex: {"id": "...", "team": "c4_team", "checkpoints": ["c4_content_analyzer"]}
+RUN_FIELD = "run"
+
+# set when the user asks to resume, so the next team started continues its interrupted run
+RESUME_RUN_FIELD = "resume_run"
 
 
 def _truncate_string(s: str, max_length: int = 100) -> str:
@@ -76,3 +83,82 @@ def set_agent_state(data: Dict[str, Any]) -> Any:
         callback_context.state.update(resolved_data)
 
     return callback
+
+
+def get_current_run(callback_context: CallbackContext) -> Optional[Dict]:
+    return callback_context.state.get(RUN_FIELD)
+
+
+def start_run(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Start a new run of the team, with its own id and no checkpoints. The interrupted run is continued instead only
+    if the user asked to resume and it belongs to this team.
+
+    :param callback_context: Callback context
+    :return: None
+    """
+    state = callback_context.state
+    run = state.get(RUN_FIELD)
+
+    if state.get(RESUME_RUN_FIELD) and run and run["team"] == callback_context.agent_name:
+        logging.info(f"[{callback_context.agent_name}] Resuming run [{run['id']}].")
+    else:
+        state[RUN_FIELD] = {
+            "id": uuid.uuid4().hex,
+            "team": callback_context.agent_name,
+            "checkpoints": [],
+        }
+
+    state[RESUME_RUN_FIELD] = False
+
+
+def skip_if_checkpointed(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Skips the agent if it has already completed in the current run, so a resumed run never redoes finished work.
+
+    :param callback_context: Callback context
+    :return: Acknowledgement content if the agent is skipped, otherwise None
+    """
+    run = get_current_run(callback_context)
+
+    if run and callback_context.agent_name in run["checkpoints"]:
+        logging.info(f"[{callback_context.agent_name}] Already completed, skipping.")
+
+        return Content(
+            role="model",
+            parts=[Part(text=f"{callback_context.agent_name} has already completed, skipping.")],
+        )
+
+
+def save_checkpoint(callback_context: CallbackContext) -> Optional[Content]:
+    """
+    Records that the agent has completed in the current run. State is persisted by the session service after every
+    event, so the checkpoint survives server restarts together with the outputs of the agent.
+
+    :param callback_context: Callback context
+    :return: None
+    """
+    run = get_current_run(callback_context)
+
+    if run and callback_context.agent_name not in run["checkpoints"]:
+        run["checkpoints"].append(callback_context.agent_name)
+
+        # reassign so the change is recorded in the state delta
+        callback_context.state[RUN_FIELD] = run
+
+
+def exit_enclosing_loop(callback_context: CallbackContext, message: str) -> Content:
+    """
+    Exits the enclosing loop agent, same as the 'exit_loop' tool does, and skips the current agent.
+
+    :param callback_context: Callback context
+    :param message: Message explaining why the loop exited
+    :return: Content to skip the current agent with
+    """
+    # CallbackContext has no public actions, the escalation is carried by the event of the skipped agent
+    callback_context._event_actions.escalate = True
+
+    return Content(
+        role="model",
+        parts=[Part(text=message)],
+    )
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from shared.utils import file_lock, get_data_dir_path, get_data_subdir_path, write_json_atomically
+
+CHUNK_SIZE = 1024 * 1024
+
+PREVIEW_LENGTH = 200
+
+# rough approximation for English text, good enough to size a prompt
+CHARS_PER_TOKEN = 4
+
+_catalogs: dict[str, dict] = {}
+
+
+def _get_max_file_chars() -> int:
+    return int(os.getenv("MAX_PROBLEM_FILE_CHARS", str(2 * 1024 * 1024)))
+
+
+def _get_max_tokens() -> int:
+    return int(os.getenv("MAX_PROBLEM_TOKENS", "8000"))
+
+
+def _get_catalog_path(directory: str) -> Path:
+    return get_data_dir_path() / "index" / f"{directory}.catalog.json"
+
+
+def _describe_file(path: Path) -> dict:
+    # hash and preview in a single streamed pass, so large files are never fully loaded into memory
+    digest = hashlib.sha256()
+    preview = b""
+
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+            if len(preview) < PREVIEW_LENGTH * 4:
+                preview += chunk[:PREVIEW_LENGTH * 4]
+
+    return {
+        "sha256": digest.hexdigest(),
+        "preview": " ".join(preview.decode("utf-8", errors="ignore").split())[:PREVIEW_LENGTH],
+    }
+
+
+def get_catalog(directory: str) -> dict[str, dict]:
+    """
+    Get the catalog of files in a data directory, with size, mtime, hash and a short preview of each file.
+
+    Only files whose size or mtime changed since the last call are read again. The catalog is kept in memory and
+    on disk, so it survives server restarts.
+
+    This scans, stats and may hash the whole directory, so call it off the event loop, ex: with asyncio.to_thread.
+
+    :param directory: directory in data directory, ex: problems
+    :return: Catalog entries by filename
+    """
+    directory_path = get_data_subdir_path(directory)
+    catalog_path = _get_catalog_path(directory)
+
+    # concurrent sessions refresh the same catalog, so the whole read-modify-write is locked
+    with file_lock(catalog_path):
+        catalog = _catalogs.get(directory)
+
+        if catalog is None and catalog_path.exists():
+            with open(catalog_path, "r") as f:
+                catalog = json.load(f)
+
+        catalog = catalog or {}
+        refreshed = {}
+
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+
+                stat = entry.stat()
+                cached = catalog.get(entry.name)
+
+                if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                    refreshed[entry.name] = cached
+                else:
+                    refreshed[entry.name] = {
+                        "filename": entry.name,
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        **_describe_file(Path(entry.path)),
+                    }
+
+        if refreshed != catalog:
+            write_json_atomically(catalog_path, refreshed)
+
+        _catalogs[directory] = refreshed
+
+        return refreshed
+
+
+def _is_heading(block: str) -> bool:
+    first_line = block.lstrip().split("\n", 1)[0]
+    return bool(re.match(r"#{1,6}\s", first_line)) or (len(first_line) < 80 and first_line.rstrip().endswith(":"))
+
+
+def trim_to_token_budget(text: str, max_tokens: int) -> tuple[str, bool]:
+    """
+    Trim text to a token budget while keeping its structure: every heading and the first paragraph of every
+    section are kept before the remaining paragraphs are filled in document order. Dropped paragraphs are replaced
+    with a '[...]' marker.
+
+    :param text: Text to trim
+    :param max_tokens: Token budget
+    :return: Tuple of trimmed text and whether it was trimmed
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+
+    if len(text) <= max_chars:
+        return text, False
+
+    blocks = [block for block in re.split(r"\n\s*\n", text) if block.strip()]
+
+    # headings, then the first paragraph of each section, then everything else
+    priorities = []
+    for i, block in enumerate(blocks):
+        if _is_heading(block):
+            priorities.append(0)
+        elif i == 0 or _is_heading(blocks[i - 1]):
+            priorities.append(1)
+        else:
+            priorities.append(2)
+
+    # each kept block costs its separator and, at worst, a '[...]' marker for the gap after it
+    gap_length = len("\n\n[...]\n\n")
+    kept = set()
+    used = gap_length
+    for priority in (0, 1, 2):
+        for i, block in enumerate(blocks):
+            if priorities[i] == priority and used + len(block) + gap_length <= max_chars:
+                kept.add(i)
+                used += len(block) + gap_length
+
+    # no paragraph fits, ex: a single huge block, so fall back to a hard cut
+    if not kept:
+        return text[:max(0, max_chars - gap_length)] + "\n\n[...]", True
+
+    trimmed = []
+    for i, block in enumerate(blocks):
+        if i in kept:
+            trimmed.append(block)
+        elif not trimmed or trimmed[-1] != "[...]":
+            trimmed.append("[...]")
+
+    return "\n\n".join(trimmed), True
+
+
+def read_bounded(path: Path) -> tuple[str, bool]:
+    """
+    Read a text file up to a size cap and trim it to the token budget.
+
+    :param path: Path of the file
+    :return: Tuple of the text and whether it was truncated
+    """
+    max_chars = _get_max_file_chars()
+
+    with open(path, "r", errors="replace") as f:
+        # read one more character than the cap to know if the file was cut
+        text = f.read(max_chars + 1)
+
+    truncated = len(text) > max_chars
+    text, trimmed = trim_to_token_budget(text[:max_chars], _get_max_tokens())
+
+    return text, truncated or trimmed
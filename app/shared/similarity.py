@@ -0,0 +1,104 @@
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from shared.utils import file_lock, get_data_dir_path, write_json_atomically
+
+INDEX_FILENAME = "solutions.json"
+
+MIN_TOKEN_LENGTH = 3
+
+
+def _get_index_path() -> Path:
+    return get_data_dir_path() / "index" / INDEX_FILENAME
+
+
+def _tokenize(text: str) -> Counter:
+    return Counter(token for token in re.findall(r"[a-z0-9]+", text.lower()) if len(token) >= MIN_TOKEN_LENGTH)
+
+
+def _load_index() -> dict:
+    index_path = _get_index_path()
+
+    if not index_path.exists():
+        return {"df": {}, "documents": {}}
+
+    with open(index_path, "r") as f:
+        return json.load(f)
+
+
+def _save_index(index: dict):
+    write_json_atomically(_get_index_path(), index)
+
+
+def _vectorize(tf: dict[str, int], df: dict[str, int], total: int) -> dict[str, float]:
+    # smoothed idf, so terms present in every document still carry some weight
+    vector = {term: count * (math.log((1 + total) / (1 + df.get(term, 0))) + 1) for term, count in tf.items()}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+
+    return {term: weight / norm for term, weight in vector.items()}
+
+
+def _add_to_index(index: dict, problem: str, solution_filename: str):
+    documents = index["documents"]
+    df = index["df"]
+
+    # replacing an existing entry must not count its terms twice
+    if solution_filename in documents:
+        for term in documents[solution_filename]["tf"]:
+            df[term] -= 1
+            if not df[term]:
+                del df[term]
+
+    tf = dict(_tokenize(problem))
+    for term in tf:
+        df[term] = df.get(term, 0) + 1
+
+    documents[solution_filename] = {"tf": tf}
+
+    _save_index(index)
+
+
+def add_to_solution_index(problem: str, solution_filename: str):
+    """
+    Add a problem and its approved solution document to the on-disk TF-IDF index.
+
+    Only term counts and document frequencies are stored, so adding a document never rescans existing ones.
+
+    :param problem: Problem statement
+    :param solution_filename: Filename of the solution document in 'proposed_solutions' directory
+    """
+    # concurrent sessions approve solutions at the same time, so the whole read-modify-write is locked
+    with file_lock(_get_index_path()):
+        _add_to_index(_load_index(), problem, solution_filename)
+
+
+def find_similar_solution(problem: str) -> Optional[tuple[str, float]]:
+    """
+    Find the solution document whose problem is the most similar to the given problem.
+
+    :param problem: Problem statement
+    :return: Tuple of solution filename and cosine similarity, or None if the index is empty
+    """
+    index = _load_index()
+    documents = index["documents"]
+
+    if not documents:
+        return None
+
+    df = index["df"]
+    total = len(documents)
+    query = _vectorize(dict(_tokenize(problem)), df, total)
+
+    best = None
+    for solution_filename, document in documents.items():
+        vector = _vectorize(document["tf"], df, total)
+        score = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+
+        if best is None or score > best[1]:
+            best = (solution_filename, score)
+
+    return best
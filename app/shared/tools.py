@@ -1,8 +1,13 @@
+import asyncio
+from pathlib import Path
+
 import markdown
 from google.adk.tools import ToolContext
 from google.genai.types import Part
 
-from shared.utils import get_data_dir_path
+from shared.callbacks import RUN_FIELD, RESUME_RUN_FIELD
+from shared.catalog import get_catalog, read_bounded
+from shared.utils import get_data_dir_path, get_data_subdir_path
 
 
 def set_state_tool(
@@ -64,8 +69,9 @@ def load_file_data_into_state_tool(
         directory: str,
         filename: str,
         field: str,
-) -> dict[str, str]:
-    """Load a file from data directory into tool context state.
+) -> dict:
+    """Load a file from data directory into tool context state. Large files are capped in size and trimmed to
+    a token budget, keeping their headings and the start of each section.
 
     Args:
         :param tool_context: tool context
@@ -73,13 +79,82 @@ def load_file_data_into_state_tool(
         :param filename: filename to load, ex: filename.txt
         :param field: a field name to save to
     Returns:
-        dict[str, str]: {"status": "success"}
+        dict: {"status": "success", "size": int, "truncated": bool}
     """
+    # only a plain filename in a known directory can be loaded, which rules out paths outside the data directory
+    if Path(filename).name != filename or filename.startswith("."):
+        raise ValueError(f"Invalid filename [{filename}].")
+
+    target_path = get_data_subdir_path(directory) / filename
+
+    if not target_path.is_file():
+        raise ValueError(f"File [{filename}] not found in [{directory}] directory.")
+
+    text, truncated = read_bounded(target_path)
+
+    # a new file replaces the previous one and starts over, so nothing is skipped from an earlier run
+    tool_context.state.update({
+        field: text,
+        RUN_FIELD: None,
+    })
+
+    return {
+        "status": "success",
+        "size": target_path.stat().st_size,
+        "truncated": truncated,
+    }
+
+
+# noinspection PyUnusedLocal
+async def list_files_tool(
+        tool_context: ToolContext,
+        directory: str,
+        query: str = "",
+        limit: int = 20,
+) -> dict:
+    """List files in data directory, most recently modified first.
+
+    Args:
+        :param tool_context: tool context
+        :param directory: directory to list files from
+        :param query: optional text to filter filenames and previews with
+        :param limit: maximum number of files to return
+    Returns:
+        dict: {"status": "success", "total": int, "files": [{"filename", "size", "preview"}]}
+    """
+    # refreshing the catalog stats and hashes files, so it runs in a thread to keep the event loop responsive
+    catalog = await asyncio.to_thread(get_catalog, directory)
+
+    query = query.lower()
+    entries = [
+        entry for entry in catalog.values()
+        if query in entry["filename"].lower() or query in entry["preview"].lower()
+    ]
+    entries.sort(key=lambda entry: entry["mtime_ns"], reverse=True)
+
+    return {
+        "status": "success",
+        "total": len(entries),
+        "files": [
+            {
+                "filename": entry["filename"],
+                "size": entry["size"],
+                "preview": entry["preview"],
+            }
+            for entry in entries[:limit]
+        ],
+    }
 
-    target_path = get_data_dir_path() / directory / filename
 
-    with open(target_path, "r") as f:
-        set_state_tool(tool_context, field, f.read())
+def resume_run_tool(tool_context: ToolContext) -> dict[str, str]:
+    """Resume the interrupted run of the next team handed off to, skipping the steps it already completed.
+
+    Args:
+        :param tool_context: tool context
+    Returns:
+        dict[str, str]: {"status": "success"}
+    """
+    tool_context.state[RESUME_RUN_FIELD] = True
 
     return {"status": "success"}
 
@@ -1,11 +1,78 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
-DATA_PATH = Path.cwd().parent.parent / "data"
+# DATA_PATH env allows running against another data directory, ex: when load testing
+DATA_PATH = Path(os.getenv("DATA_PATH", Path.cwd().parent.parent / "data"))
 
 # fail if data path does not exist
 if not DATA_PATH.exists():
     raise ValueError(f"Data path [{DATA_PATH}] does not exist.")
 
+# data directories the agents may read files from, anything else, ex: index, is internal
+DATA_DIRECTORIES = ("problems", "proposed_solutions", "images")
+
+_locks: dict[Path, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
 
 def get_data_dir_path() -> Path:
     return DATA_PATH
+
+
+def get_data_subdir_path(directory: str) -> Path:
+    """
+    Get the path of a data directory, failing for anything but the known ones, since the name comes from the model.
+
+    :param directory: directory in data directory, ex: problems
+    :return: Path of the directory
+    """
+    if directory not in DATA_DIRECTORIES:
+        raise ValueError(f"Directory [{directory}] is not one of {list(DATA_DIRECTORIES)}.")
+
+    return DATA_PATH / directory
+
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Lock a file across threads and processes, ex: to read, modify and write back an index.
+
+    :param path: Path of the file to lock, the lock itself is held on a sibling '.lock' file
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with _locks_lock:
+        thread_lock = _locks.setdefault(path, threading.Lock())
+
+    # flock only excludes other processes, the thread lock excludes the other threads of this one
+    with thread_lock, open(path.with_name(f"{path.name}.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_json_atomically(path: Path, data):
+    """
+    Write JSON through a unique temp file in the same directory, so a crash or a concurrent writer never leaves a
+    half-written file behind.
+
+    :param path: Path of the JSON file
+    :param data: Data to write
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, prefix=f".{path.name}.", delete=False) as f:
+        json.dump(data, f)
+
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise